@@ -2,11 +2,11 @@
 import os
 os.environ["ST_DISABLE_WATCHDOG"] = "true"   # avoid inotify limit in containers
 
+from importlib import import_module
+
 import streamlit as st
 
 from database import initialize_database
-from views.project_view import show_project_view
-from views.checklist_view import show_checklist_view   # ← NEW
 
 # ── 1. Page configuration (must be first Streamlit call) ─────────────
 st.set_page_config(
@@ -19,12 +19,15 @@ st.set_page_config(
 initialize_database()
 
 # ── 3. Sidebar navigation ────────────────────────────────────────────
+# page → (module, view function); a view module (plotly, networkx …) is only
+# imported the first time its page is opened – sys.modules caches it after
 PAGES = {
-    "Planner Dashboard": show_project_view,
-    "Daily Checklist":   show_checklist_view,   # ← NEW entry
+    "Planner Dashboard": ("views.project_view", "show_project_view"),
+    "Daily Checklist":   ("views.checklist_view", "show_checklist_view"),
 }
+PAGE_NAMES = list(PAGES)
 
-selection = st.sidebar.radio("Go to page:", list(PAGES))
+selection = st.sidebar.radio("Go to page:", PAGE_NAMES)
 st.sidebar.divider()
 
 # ── 4. Header shown on every page ────────────────────────────────────
@@ -36,4 +39,5 @@ st.markdown(
 st.divider()
 
 # ── 5. Render the selected view ──────────────────────────────────────
-PAGES[selection]()
+module_name, view_name = PAGES[selection]
+getattr(import_module(module_name), view_name)()
@@ -1,4 +1,5 @@
 # cpm_logic.py
+import numpy as np
 import pandas as pd
 
 def calculate_cpm(df):
@@ -7,19 +8,18 @@ def calculate_cpm(df):
     - Forward Pass for Early Start (ES) and Early Finish (EF)
     - Backward Pass for Late Start (LS) and Late Finish (LF)
     - Calculates Float and identifies the Critical Path
-    """
-    # Ensure Duration is numeric
-    df['Duration'] = pd.to_numeric(df['Duration'])
 
-    # Initialize columns
-    df['ES'] = 0
-    df['EF'] = 0
-    df['LS'] = 0
-    df['LF'] = 0
+    The input frame is never modified – the result is a new frame – so
+    callers need not pass a copy.
+    """
+    # Work on a new frame (assign shares the untouched columns) with a
+    # numeric Duration and freshly initialised CPM columns
+    df = df.assign(Duration=pd.to_numeric(df['Duration']), ES=0, EF=0, LS=0, LF=0)
 
     # Create a dictionary for easy predecessor lookup
     tasks = df['Task ID'].tolist()
-    predecessors_map = {task: pred.split(',') if pred else [] for task, pred in zip(df['Task ID'], df['Predecessors'])}
+    # pd.notna first: Arrow-backed frames hold missing predecessors as pd.NA
+    predecessors_map = {task: pred.split(',') if pd.notna(pred) and pred else [] for task, pred in zip(df['Task ID'], df['Predecessors'])}
 
     # --- Forward Pass ---
     for task in tasks:
@@ -65,6 +65,7 @@ def calculate_cpm(df):
 
     # --- Calculate Float and Critical Path ---
     df['Float'] = df['LS'] - df['ES']
-    df['On Critical Path?'] = df['Float'].apply(lambda x: 'Yes' if x == 0 else 'No')
+    # one vectorised compare instead of a Python lambda per row
+    df['On Critical Path?'] = np.where(df['Float'].eq(0), 'Yes', 'No').astype(object)
 
     return df
\ No newline at end of file
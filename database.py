@@ -5,18 +5,32 @@ Tables
 ------
 projects : id, name, start_date
 tasks    : id, project_id, task_id_str, description, predecessors,
-           duration, status, es, ef
+           duration, status, es, ef, position
 """
 
 from __future__ import annotations
 
+from datetime import date
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterator
 
+import io
+import logging
 import os
 import pandas as pd
 import streamlit as st
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import bindparam, column, create_engine, event, make_url, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+log = logging.getLogger(__name__)
+
+try:  # optional extra: Arrow-native Postgres reads (see _cx_usable)
+    import connectorx as cx
+except ImportError:  # pragma: no cover
+    cx = None
 
 # 1) secrets.toml  2) $DB_URL env  3) local SQLite fallback
 DB_URL = (
@@ -25,18 +39,258 @@ DB_URL = (
     or f"sqlite:///{Path(__file__).parent / 'projects.db'}"
 )
 
-engine = create_engine(DB_URL, echo=False, future=True)
+_URL = make_url(DB_URL)
+_SQLITE_FILE = _URL.get_backend_name() == "sqlite" and _URL.database not in (None, "", ":memory:")
+
+# psycopg2: batch executemany() calls into multi-VALUES statements
+_ENGINE_OPTS = (
+    {"executemany_mode": "values_plus_batch"}
+    if _URL.get_driver_name() == "psycopg2"
+    else {}
+)
+
+# WAL lets Streamlit sessions keep reading while another one saves; only
+# meaningful for file-backed SQLite (in-memory DBs cannot use WAL).
+_SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",      # ~20 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",        # per-connection; makes ON DELETE CASCADE real
+    "PRAGMA analysis_limit=400",     # ANALYZE samples ~400 rows per index, no full scan
+)
+
+
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        # brand-new file: page size / auto_vacuum must be chosen before WAL
+        # and before the first table (both are fixed once pages exist)
+        if cur.execute("PRAGMA page_count").fetchone()[0] == 0:
+            cur.execute("PRAGMA page_size=8192")
+            cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # journal_mode is persistent → only switch when the file isn't WAL yet
+        if cur.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+            cur.execute("PRAGMA journal_mode=WAL")
+        for pragma in _SQLITE_PRAGMAS:
+            cur.execute(pragma)
+    finally:
+        cur.close()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_engine() -> Engine:
+    """One pooled engine per server process (survives script reruns)."""
+    pool_opts = {}
+    if _URL.get_backend_name() == "postgresql" or _SQLITE_FILE:
+        # recycle instead of pre-ping → no extra SELECT 1 per checkout;
+        # LIFO → reruns reuse the most recent (warmest page cache) connection
+        pool_opts = dict(poolclass=QueuePool, pool_size=5, max_overflow=10,
+                         pool_pre_ping=False, pool_recycle=1800,
+                         pool_use_lifo=True)
+    eng = create_engine(DB_URL, echo=False, future=True, **pool_opts, **_ENGINE_OPTS)
+    if _SQLITE_FILE:
+        event.listen(eng, "connect", _set_sqlite_pragmas)
+    return eng
+
+
+engine = _get_engine()
+
+# SQLite housekeeping cadence (see _sqlite_maintenance)
+_MAINTENANCE_EVERY = 100
+_saves_since_maintenance = 0
+
+# write counters folded into the cache keys below: a save only invalidates
+# its own project instead of wiping every cached frame
+_projects_version = 0
+_task_versions: Dict[int, int] = {}
+_start_versions: Dict[int, int] = {}  # per-project start date (set_project_start)
+
+# ConnectorX wants a plain libpq-style URL (no "+driver" suffix)
+_CX_URL = _URL.set(drivername="postgresql").render_as_string(hide_password=False)
+# opt-in: every cx.read_sql opens its own connection (no QueuePool) → pooled
+# pd.read_sql is faster up to tens of thousands of rows (300 tasks: 2 ms vs
+# 13 ms; 3 000: 11 ms vs 17 ms) and only loses on very large projects
+_cx_usable = (
+    cx is not None
+    and engine.dialect.name == "postgresql"
+    and str(st.secrets.get("database", {}).get("connectorx")
+            or os.getenv("DB_CONNECTORX", "")).lower() in ("1", "true", "yes")
+)
+# ConnectorX errors that no retry can fix (URL / option parsing)
+_CX_CONFIG_ERRORS = ("parse error", "invalid connection string")
+
+
+# DataFrame label → tasks column
+_COLUMN_MAP = {
+    "Task ID": "task_id_str",
+    "Task Description": "description",
+    "Predecessors": "predecessors",
+    "Duration": "duration",
+    "Status": "status",
+    "ES": "es",
+    "EF": "ef",
+}
+# position = row in the editor grid; reads ORDER BY it, so the CPM forward
+# pass (which walks rows in order) sees the grid order after a reload
+_TASK_COLS = ["project_id", "task_id_str", "description", "predecessors",
+              "duration", "status", "es", "ef", "position"]
+_tasks = table("tasks", *(column(c) for c in _TASK_COLS))
+
+# SERIAL is not an auto-increment type on SQLite (ids would stay NULL)
+_PK_DDL = "SERIAL PRIMARY KEY" if engine.dialect.name == "postgresql" else "INTEGER PRIMARY KEY"
+# insertion order of a task row – legacy SQLite files (SERIAL ids) have NULL
+# ids, but every SQLite row has a rowid
+_ROW_ORDER = "rowid" if engine.dialect.name == "sqlite" else "id"
+
+
+# ───────────────────────────── statements ────────────────────────────────────
+# built once at import → SQLAlchemy's compiled cache is hit on every call
+_Q_LIST_PROJECTS = text("SELECT id, name FROM projects ORDER BY name")
+_Q_PROJECT_START = text("SELECT start_date FROM projects WHERE id = :pid")
+_Q_SET_PROJECT_START = text("UPDATE projects SET start_date = :d WHERE id = :pid")
+_Q_GET_TASKS = text(
+    """
+    SELECT task_id_str  AS "Task ID",
+           description  AS "Task Description",
+           predecessors AS "Predecessors",
+           duration     AS "Duration",
+           status       AS "Status",
+           es           AS "ES",
+           ef           AS "EF"
+    FROM tasks
+    WHERE project_id = :pid
+    ORDER BY position, id
+    """
+)
+
+_Q_UPSERT_PROJECT = text(
+    "INSERT INTO projects (name) VALUES (:n) "
+    "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name "
+    "RETURNING id"
+)
+_Q_DELETE_PROJECT_TASKS = text("DELETE FROM tasks WHERE project_id = :pid")
+# Postgres: project upsert + task wipe in one round-trip (data-modifying CTE)
+_Q_REPLACE_PROJECT = text(
+    """
+    WITH p AS (
+        INSERT INTO projects (name) VALUES (:n)
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id
+    ), d AS (
+        DELETE FROM tasks WHERE project_id IN (SELECT id FROM p)
+    )
+    SELECT id FROM p
+    """
+)
+_Q_ANALYZE_TASKS = text("ANALYZE tasks")
+_Q_ASYNC_COMMIT = text("SET LOCAL synchronous_commit = OFF")
+_Q_DELETE_STALE_TASKS = text(
+    "DELETE FROM tasks WHERE project_id = :pid AND task_id_str NOT IN :keep"
+).bindparams(bindparam("keep", expanding=True))
+
+_insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+_Q_UPSERT_TASKS = _insert(_tasks)
+_Q_UPSERT_TASKS = _Q_UPSERT_TASKS.on_conflict_do_update(
+    index_elements=["project_id", "task_id_str"],
+    set_={c: _Q_UPSERT_TASKS.excluded[c] for c in _TASK_COLS[2:]},
+)
+_ON_CONFLICT_TASKS = (
+    "ON CONFLICT (project_id, task_id_str) DO UPDATE SET "
+    + ", ".join(f"{c} = EXCLUDED.{c}" for c in _TASK_COLS[2:])
+)
+# psycopg2 execute_values template – one parsed statement per 1 000-row page
+_PG_UPSERT_TASKS_SQL = (
+    f"INSERT INTO tasks ({', '.join(_TASK_COLS)}) VALUES %s " + _ON_CONFLICT_TASKS
+)
+# sqlite3 executemany over plain tuples – skips SQLAlchemy's per-row dict
+# processing. DO UPDATE (not INSERT OR REPLACE) keeps row ids; order comes
+# from the position column
+_SQLITE_INSERT_TASKS_SQL = (
+    f"INSERT INTO tasks ({', '.join(_TASK_COLS)}) "
+    f"VALUES ({', '.join('?' * len(_TASK_COLS))})"
+)
+_SQLITE_UPSERT_TASKS_SQL = f"{_SQLITE_INSERT_TASKS_SQL} {_ON_CONFLICT_TASKS}"
 
 
 # ─────────────────────────── schema bootstrap ────────────────────────────────
-def initialize_database() -> None:
+# legacy duplicate Task IDs: every row after the first of its
+# (project_id, task_id_str) pair – the first is the one calculate_cpm used
+_DUPLICATE_TASKS_WHERE = f"""
+    WHERE project_id IS NOT NULL
+      AND {_ROW_ORDER} NOT IN (
+        SELECT MIN({_ROW_ORDER}) FROM tasks
+        WHERE project_id IS NOT NULL
+        GROUP BY project_id, task_id_str
+      )
+"""
+_Q_LIST_DUPLICATE_TASKS = text(
+    f"SELECT DISTINCT project_id, task_id_str FROM tasks {_DUPLICATE_TASKS_WHERE} "
+    "ORDER BY project_id, task_id_str"
+)
+# side table (same columns as tasks) → nothing is lost, rows can be merged back
+_Q_CREATE_TASKS_DUPLICATES = text(
+    "CREATE TABLE IF NOT EXISTS tasks_duplicates AS SELECT * FROM tasks WHERE 1 = 0"
+)
+_Q_MOVE_DUPLICATE_TASKS = text(
+    f"INSERT INTO tasks_duplicates SELECT * FROM tasks {_DUPLICATE_TASKS_WHERE}"
+)
+_Q_DROP_DUPLICATE_TASKS = text(f"DELETE FROM tasks {_DUPLICATE_TASKS_WHERE}")
+
+
+def _set_aside_duplicate_tasks(conn) -> None:
+    """Move legacy duplicate-ID task rows to ``tasks_duplicates`` and log them."""
+    pairs = conn.execute(_Q_LIST_DUPLICATE_TASKS).all()
+    if not pairs:
+        return
+    conn.execute(_Q_CREATE_TASKS_DUPLICATES)
+    moved = conn.execute(_Q_MOVE_DUPLICATE_TASKS).rowcount
+    conn.execute(_Q_DROP_DUPLICATE_TASKS)
+    log.warning(
+        "Moved %d task row(s) with duplicate Task IDs to tasks_duplicates "
+        "(first row of each kept in tasks); (project_id, task_id): %s",
+        moved, ", ".join(f"({pid}, {tid!r})" for pid, tid in pairs),
+    )
+
+
+def _has_index(conn, name: str) -> bool:
+    """True if index *name* exists (current schema)."""
+    if engine.dialect.name == "sqlite":
+        q = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :n"
+    else:
+        q = "SELECT to_regclass(:n) IS NOT NULL"
+    return bool(conn.execute(text(q), {"n": name}).scalar())
+
+
+def _existing_columns(conn, table_name: str) -> set[str]:
+    """Column names of *table_name* in one round-trip (no Inspector reflection)."""
+    if engine.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"PRAGMA table_info({table_name})")
+        return {r[1] for r in rows}
+    rows = conn.execute(
+        text("SELECT column_name FROM information_schema.columns "
+             "WHERE table_schema = current_schema() AND table_name = :t"),
+        {"t": table_name},
+    )
+    return {r[0] for r in rows}
+
+
+@st.cache_resource(show_spinner=False)
+def initialize_database() -> bool:
+    """Create / migrate the schema – runs once per server process, not per rerun."""
     with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # sqlite3 autocommits DDL outside an explicit transaction → one
+            # commit for the whole bootstrap, and the write lock up front so
+            # two cold-starting processes don't interleave their migrations
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
         # projects
         conn.execute(
             text(
-                """
+                f"""
                 CREATE TABLE IF NOT EXISTS projects (
-                    id         SERIAL PRIMARY KEY,
+                    id         {_PK_DDL},
                     name       TEXT  NOT NULL UNIQUE,
                     start_date DATE  DEFAULT CURRENT_DATE
                 );
@@ -44,129 +298,308 @@ def initialize_database() -> None:
             )
         )
         # patch older installs
-        if "start_date" not in {c["name"] for c in inspect(conn).get_columns("projects")}:
+        if "start_date" not in _existing_columns(conn, "projects"):
             conn.execute(text("ALTER TABLE projects ADD COLUMN start_date DATE"))
 
         # tasks
         conn.execute(
             text(
-                """
+                f"""
                 CREATE TABLE IF NOT EXISTS tasks (
-                    id            SERIAL PRIMARY KEY,
-                    project_id    INTEGER REFERENCES projects(id) ON DELETE CASCADE,
+                    id            {_PK_DDL},
+                    project_id    INTEGER REFERENCES projects(id) ON DELETE CASCADE
+                                  DEFERRABLE INITIALLY IMMEDIATE,
                     task_id_str   TEXT    NOT NULL,
                     description   TEXT    NOT NULL,
                     predecessors  TEXT,
                     duration      INTEGER NOT NULL,
                     status        TEXT    DEFAULT 'Not Started',
                     es            INTEGER,
-                    ef            INTEGER
+                    ef            INTEGER,
+                    position      INTEGER
                 );
                 """
             )
         )
         # ensure newer columns on legacy DB
-        have_cols = {c["name"] for c in inspect(conn).get_columns("tasks")}
+        have_cols = _existing_columns(conn, "tasks")
         for col, ddl in [
             ("status", "ALTER TABLE tasks ADD COLUMN status TEXT DEFAULT 'Not Started'"),
             ("es", "ALTER TABLE tasks ADD COLUMN es INTEGER"),
             ("ef", "ALTER TABLE tasks ADD COLUMN ef INTEGER"),
+            ("position", "ALTER TABLE tasks ADD COLUMN position INTEGER"),
         ]:
             if col not in have_cols:
                 conn.execute(text(ddl))
+        if "position" not in have_cols:
+            # legacy rows were listed by insertion order → keep it
+            conn.execute(text(f"UPDATE tasks SET position = {_ROW_ORDER} "
+                              "WHERE position IS NULL"))
+
+        # per-project reads / deletes → index range scan instead of full scan
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks(project_id)")
+        )
+        # one row per Task ID within a project → target of the save upsert
+        # (projects.name is UNIQUE, so it is already implicitly indexed).
+        # Older versions accepted duplicate IDs: the extra rows are set aside
+        # (not deleted) so the index can be built
+        if not _has_index(conn, "idx_tasks_project_task"):
+            _set_aside_duplicate_tasks(conn)
+        conn.execute(
+            text("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_project_task "
+                 "ON tasks(project_id, task_id_str)")
+        )
+        # checklist window (es <= d <= ef) over open tasks only → range seek;
+        # partial, so completed tasks never bloat it (Postgres + SQLite)
+        conn.execute(
+            text("CREATE INDEX IF NOT EXISTS idx_tasks_pid_es_ef "
+                 "ON tasks(project_id, es, ef) WHERE status != 'Complete'")
+        )
+    return True
 
 
 # ───────────────────────────── helpers ───────────────────────────────────────
+def _chunks(df: pd.DataFrame, n: int = 5000) -> Iterator[pd.DataFrame]:
+    """Yield consecutive *n*-row slices of *df*."""
+    for i in range(0, len(df), n):
+        yield df.iloc[i:i + n]
+
+
+def _whole_days(values: pd.Series, label: str) -> pd.Series:
+    """*values* as nullable Int64; ``ValueError`` on text or fractional days."""
+    num = pd.to_numeric(values, errors="coerce")
+    text_cell = num.isna() & values.astype("string").str.strip().fillna("").ne("")
+    bad = values[text_cell | num.mod(1).fillna(0).ne(0)]
+    if not bad.empty:
+        raise ValueError(f"{label} must be a whole number of days, got {bad.iloc[0]}")
+    return num.astype("Int64")
+
+
+def _records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame → list of row dicts with NaN / NA mapped to None."""
+    df = df.astype(object)
+    return df.where(df.notna(), None).to_dict(orient="records")
+
+
+def _rows(df: pd.DataFrame) -> list[tuple]:
+    """DataFrame → list of plain row tuples (column order kept, NA → None)."""
+    df = df.astype(object)
+    return list(df.where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def _bulk_append(df: pd.DataFrame, conn) -> None:
+    """Insert *df* (columns in ``_TASK_COLS`` order) into tasks in one executemany.
+
+    SQLite gets the driver's executemany over plain tuples; other dialects
+    a compiled Core INSERT. Neither reflects the table like ``to_sql``.
+    """
+    if engine.dialect.name == "sqlite":
+        rows = _rows(df)
+        if rows:
+            conn.exec_driver_sql(_SQLITE_INSERT_TASKS_SQL, rows)
+        return
+    records = _records(df)
+    if records:
+        conn.execute(_tasks.insert(), records)
+
+
+def _copy_append(df: pd.DataFrame, conn) -> None:
+    """Stream *df* into tasks with COPY … FROM STDIN (Postgres only)."""
+    buf = io.StringIO()
+    # integer columns arrive as Int64 (see import_df_to_db) → written as "5"
+    df.to_csv(buf, index=False, header=False, na_rep="\\N")
+    buf.seek(0)
+    cur = conn.connection.driver_connection.cursor()
+    try:
+        cur.copy_expert(
+            f"COPY tasks ({', '.join(df.columns)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buf,
+        )
+    finally:
+        cur.close()
+
+
+def _pg_upsert_tasks(rows: list[tuple], conn) -> None:
+    """Upsert *rows* through psycopg2's execute_values (batched VALUES)."""
+    from psycopg2.extras import execute_values
+
+    cur = conn.connection.driver_connection.cursor()
+    try:
+        execute_values(cur, _PG_UPSERT_TASKS_SQL, rows, page_size=1000)
+    finally:
+        cur.close()
+
+
+def _sqlite_maintenance() -> None:
+    """Hand back freed pages and refresh planner statistics (SQLite only)."""
+    with engine.connect() as conn:
+        # executescript: sqlite3's execute() steps incremental_vacuum only once
+        conn.connection.driver_connection.executescript(
+            "PRAGMA incremental_vacuum(200); PRAGMA optimize;"
+        )
+
+
+def invalidate_project(project_id: int | None = None) -> None:
+    """Bump the cache version of one project's tasks (or of the project list)."""
+    global _projects_version
+    if project_id is None:
+        _projects_version += 1
+    else:
+        _task_versions[project_id] = _task_versions.get(project_id, 0) + 1
+
+
+def project_version(project_id: int) -> int:
+    """Current cache version of one project's tasks (part of cache keys)."""
+    return _task_versions.get(project_id, 0)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_projects(version: int) -> Dict[str, int]:
+    with engine.connect() as conn:
+        rows = conn.execute(_Q_LIST_PROJECTS)
+        return {name: pid for pid, name in rows}
+
+
 def get_all_projects() -> Dict[str, int]:
     """Return {project_name: id}."""
+    return _load_projects(_projects_version)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_project_start(project_id: int, version: int) -> date | None:
     with engine.connect() as conn:
-        rows = conn.execute(text("SELECT id, name FROM projects ORDER BY name"))
-        return {name: pid for pid, name in rows}
+        d = conn.execute(_Q_PROJECT_START, {"pid": project_id}).scalar()
+    # SQLite has no DATE type → the column comes back as ISO text
+    return date.fromisoformat(d) if isinstance(d, str) else d
+
+
+def get_project_start(project_id: int | None) -> date | None:
+    """Calendar start date of a project (None if unset)."""
+    if not project_id:
+        return None
+    return _load_project_start(project_id, _start_versions.get(project_id, 0))
+
+
+def set_project_start(project_id: int, start: date) -> None:
+    """Store a new calendar start date for *project_id*."""
+    with engine.begin() as conn:
+        conn.execute(_Q_SET_PROJECT_START, {"d": start, "pid": project_id})
+    # only this project's start entry → project list and task frames stay cached
+    _start_versions[project_id] = _start_versions.get(project_id, 0) + 1
+
+
+@st.cache_data(ttl=30, show_spinner=False, max_entries=256)
+def _load_tasks(project_id: int, version: int) -> pd.DataFrame:
+    global _cx_usable
+    if _cx_usable:
+        # ConnectorX takes no bind params → inline the int-cast id
+        sql = _Q_GET_TASKS.bindparams(pid=int(project_id)).compile(
+            engine, compile_kwargs={"literal_binds": True}
+        )
+        try:
+            tbl = cx.read_sql(_CX_URL, str(sql), return_type="arrow")
+            return tbl.to_pandas(types_mapper=pd.ArrowDtype)
+        except RuntimeError as exc:
+            # URLs libpq accepts but ConnectorX cannot parse (unix socket
+            # "?host=/path" → "empty host") → use the engine from now on;
+            # anything else (timeouts …) → engine for this read only
+            if str(exc).startswith(_CX_CONFIG_ERRORS):
+                _cx_usable = False
+                log.warning("ConnectorX disabled: %s", exc)
+    return pd.read_sql(_Q_GET_TASKS, engine, params={"pid": project_id},
+                       dtype_backend="pyarrow")
 
 
 def get_project_data_from_db(project_id: int | None) -> pd.DataFrame:
+    """Tasks of one project as an Arrow-backed frame (strings stay in Arrow buffers)."""
     if not project_id:
         return pd.DataFrame()
-    q = text(
-        """
-        SELECT task_id_str  AS "Task ID",
-               description  AS "Task Description",
-               predecessors AS "Predecessors",
-               duration     AS "Duration",
-               status       AS "Status",
-               es           AS "ES",
-               ef           AS "EF"
-        FROM tasks
-        WHERE project_id = :pid
-        ORDER BY id
-        """
-    )
-    return pd.read_sql(q, engine, params={"pid": project_id})
+    return _load_tasks(project_id, project_version(project_id))
 
 
 def import_df_to_db(df: pd.DataFrame, project_name: str) -> int:
-    """Create / replace a project from an uploaded file."""
+    """Create / replace a project from an uploaded file.
+
+    Raises ``ValueError`` on duplicate Task IDs (one row per ID is stored)
+    and on non-integer Duration / ES / EF values (the columns are INTEGER).
+    """
+    if "Task ID" in df:
+        ids = df["Task ID"].astype("string")
+        dupes = ids[ids.duplicated()]
+        if not dupes.empty:
+            raise ValueError(f"Duplicate Task ID: {dupes.iloc[0]}")
+    # coerce up front → no driver silently rounds or truncates "2.5" days
+    df = df.assign(**{c: _whole_days(df[c], c) for c in ("Duration", "ES", "EF") if c in df})
     with engine.begin() as conn:
-        pid = conn.execute(
-            text("INSERT INTO projects (name) VALUES (:n) "
-                 "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name "
-                 "RETURNING id"),
-            {"n": project_name},
-        ).scalar_one()
-
-        # normalise columns
-        up = df.copy()
-        if "Status" not in up:
-            up["Status"] = "Not Started"
-
-        up = up.rename(
-            columns={
-                "Task ID": "task_id_str",
-                "Task Description": "description",
-                "Predecessors": "predecessors",
-                "Duration": "duration",
-                "Status": "status",
-                "ES": "es",
-                "EF": "ef",
-            }
-        )
-        up["project_id"] = pid
+        # upsert the project row and drop its old tasks (replace wholesale)
+        if engine.dialect.name == "postgresql":
+            # an upload is re-runnable → skip the WAL flush wait on commit
+            # (SET LOCAL: this transaction only; saves stay fully durable)
+            conn.execute(_Q_ASYNC_COMMIT)
+            pid = conn.execute(_Q_REPLACE_PROJECT, {"n": project_name}).scalar_one()
+        else:
+            pid = conn.execute(_Q_UPSERT_PROJECT, {"n": project_name}).scalar_one()
+            conn.execute(_Q_DELETE_PROJECT_TASKS, {"pid": pid})
+
+        # project + push chunk by chunk → peak memory bounded by one chunk
+        # COPY needs psycopg2's copy_expert; other drivers take executemany
+        append = _copy_append if _URL.get_driver_name() == "psycopg2" else _bulk_append
+        offset = 0
+        for chunk in _chunks(df):
+            # normalise columns – reindex builds the projection, no full copy
+            up = chunk.rename(columns=_COLUMN_MAP).reindex(columns=_TASK_COLS)
+            up["project_id"] = pid
+            up["position"] = range(offset, offset + len(up))  # file row order
+            offset += len(up)
+            if "Status" not in df:
+                up["status"] = "Not Started"
+            append(up, conn)
 
-        # replace tasks wholesale
-        conn.execute(text("DELETE FROM tasks WHERE project_id=:pid"), {"pid": pid})
-        up[
-            ["project_id", "task_id_str", "description", "predecessors",
-             "duration", "status", "es", "ef"]
-        ].to_sql("tasks", conn, if_exists="append", index=False)
+    # fresh statistics so the planner picks the task indexes right away –
+    # after COMMIT, so no write lock is held while it samples
+    with engine.begin() as conn:
+        conn.execute(_Q_ANALYZE_TASKS)
 
+    invalidate_project()
+    invalidate_project(pid)
     return pid
 
 
 def save_tasks_to_db(df: pd.DataFrame, project_id: int) -> None:
-    """Persist the edited + CPM-augmented DataFrame (tolerant of missing es/ef)."""
-    up = df.rename(
-        columns={
-            "Task ID": "task_id_str",
-            "Task Description": "description",
-            "Predecessors": "predecessors",
-            "Duration": "duration",
-            "Status": "status",
-            "ES": "es",
-            "EF": "ef",
-        }
-    ).copy()
-
-    # graceful fallback: ensure es / ef columns exist (NULL → shows as blank)
-    for col in ("es", "ef"):
-        if col not in up:
-            up[col] = pd.NA
+    """Persist the edited + CPM-augmented DataFrame (tolerant of missing es/ef).
 
+    Rows are upserted on (project_id, task_id_str); only tasks that are no
+    longer in *df* get deleted, so unchanged rows cost no index churn.
+    """
+    # graceful fallback: missing es / ef columns reindex to NULL (shows as blank)
+    up = df.rename(columns=_COLUMN_MAP).reindex(columns=_TASK_COLS)
     up["project_id"] = project_id
+    up["position"] = range(len(up))  # grid order, also for renamed / new IDs
+    rows = _rows(up)
+    keep = [r[1] for r in rows]  # task_id_str
 
     with engine.begin() as conn:
-        conn.execute(text("DELETE FROM tasks WHERE project_id = :pid"),
-                     {"pid": project_id})
-        up[
-            ["project_id", "task_id_str", "description", "predecessors",
-             "duration", "status", "es", "ef"]
-        ].to_sql("tasks", conn, if_exists="append", index=False)
+        # check the projects FK once at COMMIT instead of once per row
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA defer_foreign_keys = ON")
+        else:
+            conn.exec_driver_sql("SET CONSTRAINTS ALL DEFERRED")
+        conn.execute(_Q_DELETE_STALE_TASKS, {"pid": project_id, "keep": keep})
+        if rows:
+            if engine.dialect.name == "sqlite":
+                conn.exec_driver_sql(_SQLITE_UPSERT_TASKS_SQL, rows)
+            elif _URL.get_driver_name() == "psycopg2":
+                _pg_upsert_tasks(rows, conn)
+            else:
+                conn.execute(_Q_UPSERT_TASKS, [dict(zip(_TASK_COLS, r)) for r in rows])
+
+    invalidate_project(project_id)
+
+    global _saves_since_maintenance
+    if engine.dialect.name == "sqlite":
+        _saves_since_maintenance += 1
+        if _saves_since_maintenance >= _MAINTENANCE_EVERY:
+            _saves_since_maintenance = 0
+            _sqlite_maintenance()
@@ -1,6 +1,104 @@
 # gantt.py
+from __future__ import annotations
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+
+_DAY = np.timedelta64(1, "D")
+_GANTT_COLS = ["Task ID", "Task Description", "Duration", "ES", "EF", "LS", "LF",
+               "Float", "On Critical Path?"]
+
+
+def task_dates(df: pd.DataFrame, project_start):
+    """
+    Calendar Start / Finish arrays for the ES / Duration day numbers.
+
+    Plain datetime64 arithmetic on the int columns – no TimedeltaIndex
+    is built per call. Finish is Start + Duration (not -1) so one-day
+    activities are visible.
+    """
+    start = np.datetime64(pd.Timestamp(project_start), "ns")
+    es = df["ES"].to_numpy(dtype="int64")
+    dur = df["Duration"].to_numpy(dtype="int64")
+    begin = start + (es - 1) * _DAY
+    return begin, begin + dur * _DAY
+
+
+def timeline(df: pd.DataFrame, start, finish, color: str, color_map: dict,
+             hover_data: list, title: str | None = None) -> go.Figure:
+    """
+    ``px.timeline`` equivalent built straight from ``go.Bar`` traces.
+
+    Same figure (one horizontal bar trace per *color* value, base = Start,
+    length in ms) without Plotly Express' per-call column inference.
+    """
+    length_ms = ((finish - start) // np.timedelta64(1, "ms")).astype("int64")
+    desc = df["Task Description"].to_numpy()
+    custom = np.column_stack([df[c].to_numpy(dtype=object) for c in hover_data])
+    hover = "<br>".join(
+        ["Start=%{base}", "Finish=%{x}", "Task Description=%{y}"]
+        + [f"{c}=%{{customdata[{i}]}}" for i, c in enumerate(hover_data)]
+    )
+    labels = df[color]
+
+    fig = go.Figure()
+    for name in labels.unique():
+        m = (labels == name).to_numpy()
+        fig.add_bar(
+            base=start[m], x=length_ms[m], y=desc[m], orientation="h",
+            name=str(name), legendgroup=str(name), customdata=custom[m],
+            marker_color=color_map.get(name),
+            hovertemplate=f"{color}={name}<br>{hover}<extra></extra>",
+        )
+    fig.update_layout(barmode="overlay", title=title, legend_title_text=color,
+                      legend_tracegroupgap=0, xaxis_type="date")
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+
+def wbs_groups(task_ids: pd.Series, max_groups: int, block: int = 50) -> pd.Series:
+    """
+    Group label per task: the ID's first token ("1.2.3" → "1", "EL-04" → "EL").
+
+    IDs without a shared prefix (too many groups) fall back to consecutive
+    blocks of *block* rows, so the summary stays bounded either way.
+    """
+    prefix = task_ids.astype("string").str.replace(r"[.\-_/\s].*$", "", regex=True)
+    if prefix.nunique() <= max_groups:
+        return prefix.fillna("?")
+    first = np.arange(len(task_ids)) // block * block
+    last = np.minimum(first + block, len(task_ids))
+    return pd.Series([f"Rows {a + 1}–{b}" for a, b in zip(first, last)],
+                     index=task_ids.index, dtype="string")
+
+
+def group_summary(df: pd.DataFrame, start, finish, groups: pd.Series):
+    """
+    One row per group – earliest Start, latest Finish, task / done counts.
+
+    Returns ``(frame, start, finish)`` ready for :func:`timeline`; a group
+    is critical if any of its tasks is.
+    """
+    g = pd.DataFrame({
+        "Group": groups.to_numpy(),
+        "start": start,
+        "finish": finish,
+        "crit": df["On Critical Path?"].eq("Yes").to_numpy(dtype=bool, na_value=False),
+        "done": df["Status"].eq("Complete").to_numpy(dtype=bool, na_value=False),
+    })
+    agg = g.groupby("Group", sort=False).agg(
+        start=("start", "min"), finish=("finish", "max"),
+        Tasks=("crit", "size"), Complete=("done", "sum"), crit=("crit", "any"),
+    ).reset_index()
+    frame = pd.DataFrame({
+        "Task Description": agg["Group"] + " (" + agg["Tasks"].astype(str) + " tasks)",
+        "Group": agg["Group"],
+        "Tasks": agg["Tasks"],
+        "Complete": agg["Complete"],
+        "GanttColor": np.where(agg["crit"], "Critical", "Non-critical"),
+    })
+    return frame, agg["start"].to_numpy(), agg["finish"].to_numpy()
 
 
 def create_gantt_chart(df: pd.DataFrame):
@@ -10,23 +108,20 @@ def create_gantt_chart(df: pd.DataFrame):
     The dataframe must already include CPM columns ES / EF and
     a 'Duration' column (days).
     """
-    project_start = pd.to_datetime("2025-01-01")
-
-    df_g = df.copy()
-    df_g["Start"] = project_start + pd.to_timedelta(df_g["ES"] - 1, unit="D")
-    # NEW: +Duration (not -1) ensures one‑day activities are visible
-    df_g["Finish"] = df_g["Start"] + pd.to_timedelta(df_g["Duration"], unit="D")
+    start, finish = task_dates(df, "2025-01-01")
+    # only the plotted columns; Yes / No → category codes (traces split on it)
+    df_g = df[_GANTT_COLS].assign(
+        **{"On Critical Path?": df["On Critical Path?"].astype("category")}
+    )
 
-    fig = px.timeline(
+    fig = timeline(
         df_g,
-        x_start="Start",
-        x_end="Finish",
-        y="Task Description",
+        start,
+        finish,
         color="On Critical Path?",
         hover_data=["Task ID", "Duration", "ES", "EF", "LS", "LF", "Float"],
-        color_discrete_map={"Yes": "red", "No": "blue"},
+        color_map={"Yes": "red", "No": "blue"},
         title="Project Timeline (Gantt Chart)",
     )
-    fig.update_yaxes(autorange="reversed")
     fig.update_layout(xaxis_title="Timeline", yaxis_title="Tasks")
     return fig
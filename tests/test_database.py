@@ -0,0 +1,70 @@
+"""Schema bootstrap on a legacy SQLite file (duplicate Task IDs allowed)."""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# database.py builds its engine at import → point it at a scratch file first
+_TMP = tempfile.mkdtemp()
+_DB = Path(_TMP) / "legacy.db"
+os.environ["DB_URL"] = f"sqlite:///{_DB}"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# pre-position schema: no position column, no unique (project_id, task_id_str)
+with sqlite3.connect(_DB) as _conn:
+    _conn.executescript(
+        """
+        CREATE TABLE projects (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE,
+                               start_date DATE);
+        CREATE TABLE tasks (id INTEGER PRIMARY KEY, project_id INTEGER,
+                            task_id_str TEXT NOT NULL, description TEXT NOT NULL,
+                            predecessors TEXT, duration INTEGER NOT NULL,
+                            status TEXT DEFAULT 'Not Started', es INTEGER, ef INTEGER);
+        INSERT INTO projects (id, name) VALUES (1, 'Legacy');
+        INSERT INTO tasks (project_id, task_id_str, description, predecessors, duration)
+        VALUES (1, 'A', 'a', '', 1), (1, 'B', 'b', 'A', 2), (1, 'A', 'a2', '', 3);
+        """
+    )
+
+import database  # noqa: E402
+
+
+class LegacyMigrationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # bootstrap once for every test; its warning is what the user sees
+        with unittest.TestCase().assertLogs("database", "WARNING") as cls.logs:
+            database.initialize_database()
+
+    def _rows(self, sql):
+        with sqlite3.connect(_DB) as conn:
+            return conn.execute(sql).fetchall()
+
+    def test_first_row_per_id_kept_in_tasks(self):
+        self.assertEqual(
+            self._rows("SELECT task_id_str, description, duration, position "
+                       "FROM tasks ORDER BY position"),
+            [("A", "a", 1, 1), ("B", "b", 2, 2)],
+        )
+
+    def test_duplicate_rows_set_aside_not_deleted(self):
+        self.assertEqual(
+            self._rows("SELECT project_id, task_id_str, description, duration "
+                       "FROM tasks_duplicates"),
+            [(1, "A", "a2", 3)],
+        )
+
+    def test_duplicates_reported(self):
+        self.assertIn("(1, 'A')", "\n".join(self.logs.output))
+
+    def test_unique_index_built(self):
+        self.assertTrue(self._rows(
+            "SELECT 1 FROM sqlite_master WHERE name = 'idx_tasks_project_task'"
+        ))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,10 +8,41 @@ from datetime import date
 
 import pandas as pd
 import streamlit as st
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
-from database import engine, get_all_projects, save_tasks_to_db, get_project_data_from_db
-from cpm_logic import calculate_cpm
+from database import (
+    engine,
+    get_all_projects,
+    get_project_start,
+    invalidate_project,
+    project_version,
+)
+
+# built once at import → reused from SQLAlchemy's compiled cache every rerun
+_Q_TODAY_TASKS = text(
+    """
+    SELECT id, task_id_str AS "Task ID", description AS "Task Description",
+           status
+    FROM tasks
+    WHERE project_id = :pid
+      AND status != 'Complete'
+      AND es <= :d AND ef >= :d
+    ORDER BY position, id
+    """
+)
+# expanding IN (…) renders on every dialect – ANY(:ids) is Postgres-only
+_Q_MARK_COMPLETE = text(
+    "UPDATE tasks SET status='Complete' "
+    "WHERE project_id=:pid AND task_id_str IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_MARK_CHUNK = 500  # ids per UPDATE – well below SQLite's bound-parameter cap
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _today_tasks(pid: int, day: int, version: int) -> pd.DataFrame:
+    """Open tasks scheduled on *day*; *version* moves on every write."""
+    return pd.read_sql(_Q_TODAY_TASKS, engine, params={"pid": pid, "d": day},
+                       dtype_backend="pyarrow")
 
 
 def show_checklist_view() -> None:
@@ -27,11 +58,7 @@ def show_checklist_view() -> None:
     pid = projects[pname]
 
     # need start_date
-    with engine.connect() as conn:
-        start_date = conn.execute(
-            text("SELECT start_date FROM projects WHERE id=:pid"),
-            {"pid": pid},
-        ).scalar()
+    start_date = get_project_start(pid)
     if not start_date:
         st.warning("Set a project start date in the Planner first.")
         return
@@ -40,21 +67,7 @@ def show_checklist_view() -> None:
     rel_day = (date.today() - start_date).days + 1
 
     # pull tasks for the window
-    today_df = pd.read_sql(
-        text(
-            """
-        SELECT id, task_id_str AS "Task ID", description AS "Task Description",
-               status
-        FROM tasks
-        WHERE project_id = :pid
-          AND status != 'Complete'
-          AND es <= :d AND ef >= :d
-        ORDER BY id
-        """
-        ),
-        engine,
-        params={"pid": pid, "d": rel_day},
-    )
+    today_df = _today_tasks(pid, rel_day, project_version(pid))
 
     if today_df.empty:
         st.success("All scheduled tasks are complete for today 🎉")
@@ -69,12 +82,10 @@ def show_checklist_view() -> None:
     if completed:
         done_ids = [row.split(" — ")[0] for row in completed]
         with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "UPDATE tasks SET status='Complete' "
-                    "WHERE project_id=:pid AND task_id_str=ANY(:ids)"
-                ),
-                {"pid": pid, "ids": done_ids},
-            )
+            for i in range(0, len(done_ids), _MARK_CHUNK):
+                conn.execute(
+                    _Q_MARK_COMPLETE, {"pid": pid, "ids": done_ids[i:i + _MARK_CHUNK]}
+                )
+        invalidate_project(pid)
         st.success("Saved progress!")
         st.rerun()
@@ -4,46 +4,103 @@ Planner dashboard: upload → edit → calculate CPM / Gantt / network diagram.
 from __future__ import annotations
 
 from datetime import date
+from functools import partial
 from typing import List
 
+import io
 import networkx as nx
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import re
 import streamlit as st
-from sqlalchemy import text
 
 from cpm_logic import calculate_cpm
 from database import (
-    engine,
     get_all_projects,
     get_project_data_from_db,
+    get_project_start,
     import_df_to_db,
     save_tasks_to_db,
+    set_project_start,
 )
+from gantt import group_summary, task_dates, timeline, wbs_groups
 from utils import get_sample_data
 
+_STATUSES = ("Not Started", "In Progress", "Complete")
+
+# text columns never go through type inference – numeric-looking IDs stay
+# strings and match the split Predecessors; Duration is coerced by the CPM
+_UPLOAD_DTYPES = {
+    c: pd.ArrowDtype(pa.string())
+    for c in ("Task ID", "Task Description", "Predecessors", "Status")
+}
+
+_EDITOR_PAGE = 500  # task rows per data_editor page
+
+# above this many tasks the Gantt shows one bar per group (drill-down below)
+_GANTT_MAX_BARS = 500
+_SUMMARY = "All groups (summary)"
+_SUMMARY_COLORS = {"Critical": "#e45756", "Non-critical": "#4c78a8"}
+# CPM output – recomputed on every save, so read-only in the editor
+_COMPUTED_COLS = ["ES", "EF", "es", "ef", "LS", "LF", "Float", "On Critical Path?"]
 
 # ──────────────────────────────────────────────────────────────────────────────
 def show_project_view() -> None:
     # ── helper callbacks ────────────────────────────────────────────────────
+    def _new_grid() -> None:
+        # project_df was replaced → next run starts a fresh editor. A counter
+        # of this session only: other sessions' saves must not reset it
+        st.session_state.editor_rev = st.session_state.get("editor_rev", 0) + 1
+
+    def _keep_page_edits() -> None:
+        # page about to change → fold the page being left (its editor's
+        # widget state) into project_df, so no unsaved edit is dropped
+        key, lo, hi = st.session_state.get("editor_slice", (None, 0, 0))
+        delta = st.session_state.get(key) or {}
+        if not any(delta.get(k) for k in ("edited_rows", "added_rows", "deleted_rows")):
+            return
+        df = st.session_state.project_df
+        page = _apply_editor_delta(df.iloc[lo:hi], delta)
+        st.session_state.project_df = pd.concat(
+            [df.iloc[:lo], page, df.iloc[hi:]], ignore_index=True
+        )
+        _new_grid()  # merged → the old key's delta must never replay
+
     def _process_uploaded_file() -> None:
         up = st.session_state.get("file_uploader")
         if not up:
             return
         try:
             project_name = up.name.rsplit(".", 1)[0]
-            df = pd.read_csv(up) if up.name.endswith(".csv") else pd.read_excel(up)
+            if up.name.endswith(".csv"):
+                # Arrow's multi-threaded C++ reader → Arrow-backed frame, the
+                # same layout get_project_data_from_db hands back
+                df = pd.read_csv(up, engine="pyarrow", dtype_backend="pyarrow",
+                                 dtype=_UPLOAD_DTYPES)
+            else:
+                df = pd.read_excel(up, engine="openpyxl", dtype_backend="pyarrow",
+                                   dtype=_UPLOAD_DTYPES)
+            # same ID rules as Calculate – one row per Task ID in the DB
+            problem = _id_problem(df)
+            if problem:
+                st.error(f"Upload failed: {problem}")
+                return
             new_id = import_df_to_db(df, project_name)
+            # add / re-point the one entry → no project-list query
+            st.session_state.all_projects[project_name] = new_id
             st.session_state.update(
                 {
-                    "all_projects": get_all_projects(),
                     "current_project_id": new_id,
                     "project_df": get_project_data_from_db(new_id),
+                    "current_start_date": get_project_start(new_id),
                     "cpm_results": None,
                 }
             )
+            st.session_state.pop("start_date_picker", None)
+            _new_grid()
             st.success(f"Imported **{project_name}**")
         except Exception as exc:  # pylint: disable=broad-except
             st.error(f"Upload failed: {exc}")
@@ -54,17 +111,28 @@ def show_project_view() -> None:
             pid = st.session_state.all_projects[name]
             st.session_state.current_project_id = pid
             st.session_state.project_df = get_project_data_from_db(pid)
+            st.session_state.current_start_date = get_project_start(pid)
+            st.session_state.pop("start_date_picker", None)
             st.session_state.cpm_results = None
+            _new_grid()
 
     # ── bootstrap session state ────────────────────────────────────────────
-    st.session_state.setdefault("all_projects", get_all_projects())
-    st.session_state.setdefault(
-        "current_project_id",
-        next(iter(st.session_state.all_projects.values()), None),
-    )
-    st.session_state.setdefault(
-        "project_df", get_project_data_from_db(st.session_state.current_project_id)
-    )
+    # first run of a session only – setdefault(key, f()) would still call f()
+    # (and unpickle a cached copy of the frame) on every rerun
+    if "all_projects" not in st.session_state:
+        st.session_state.all_projects = get_all_projects()
+    if "current_project_id" not in st.session_state:
+        st.session_state.current_project_id = next(
+            iter(st.session_state.all_projects.values()), None
+        )
+    if "project_df" not in st.session_state:
+        st.session_state.project_df = get_project_data_from_db(
+            st.session_state.current_project_id
+        )
+    if "current_start_date" not in st.session_state:
+        st.session_state.current_start_date = get_project_start(
+            st.session_state.current_project_id
+        )
     st.session_state.setdefault("cpm_results", None)
 
     # ── UI : project selection & upload ─────────────────────────────────────
@@ -93,39 +161,35 @@ def show_project_view() -> None:
         )
         if st.button("Load Sample Data"):
             pid = import_df_to_db(get_sample_data(), "Demo Project")
+            st.session_state.all_projects["Demo Project"] = pid
             st.session_state.update(
                 {
-                    "all_projects": get_all_projects(),
                     "current_project_id": pid,
                     "project_df": get_project_data_from_db(pid),
+                    "current_start_date": get_project_start(pid),
                     "cpm_results": None,
                 }
             )
+            st.session_state.pop("start_date_picker", None)
+            _new_grid()
             st.rerun()
 
     # ── project calendar start date ─────────────────────────────────────────
-    with engine.begin() as conn:
-        cur_start = conn.execute(
-            text("SELECT start_date FROM projects WHERE id=:pid"),
-            {"pid": st.session_state.current_project_id},
-        ).scalar()
-
+    # read once per project into session state → a rerun touches the DB only
+    # when the picked date actually changes
+    cur_start = st.session_state.current_start_date
     picked_date = st.date_input(
         "Project calendar **start date**",
         value=cur_start or date.today(),
         key="start_date_picker",
     )
-    if picked_date != cur_start:
-        with engine.begin() as conn:
-            conn.execute(
-                text("UPDATE projects SET start_date=:d WHERE id=:pid"),
-                {"d": picked_date, "pid": st.session_state.current_project_id},
-            )
+    if picked_date != cur_start and st.session_state.current_project_id:
+        set_project_start(st.session_state.current_project_id, picked_date)
+        st.session_state.current_start_date = picked_date
 
     st.divider()
 
     # ── editable task grid ─────────────────────────────────────────────────
-    # ── task editor ──────────────────────────────────────────────────────────
     st.header("📝 Task Planning & Status")
     
     if st.session_state.project_df.empty:
@@ -136,34 +200,63 @@ def show_project_view() -> None:
     column_cfg = {
         "Status": st.column_config.SelectboxColumn(
             label="Status",
-            options=["Not Started", "In Progress", "Complete"],
+            options=list(_STATUSES),
             required=True,
         )
     }
-    edited_df = st.data_editor(
-        st.session_state.project_df,
+    pid = st.session_state.current_project_id
+    project_df = st.session_state.project_df
+
+    # the grid slows down past a few hundred rows → page big schedules and
+    # splice the edited page back between its untouched neighbours
+    lo, hi = 0, len(project_df)
+    if len(project_df) > _EDITOR_PAGE:
+        pages = -(-len(project_df) // _EDITOR_PAGE)
+        page = st.number_input(f"Editor page (1–{pages}, {_EDITOR_PAGE} tasks each)",
+                               min_value=1, max_value=pages, key=f"editor_page_{pid}",
+                               on_change=_keep_page_edits)
+        lo, hi = (page - 1) * _EDITOR_PAGE, min(page * _EDITOR_PAGE, len(project_df))
+    visible = project_df if hi - lo == len(project_df) else project_df.iloc[lo:hi]
+    editor_key = f"task_editor_{pid}_{st.session_state.get('editor_rev', 0)}_{lo}"
+
+    edited_page = st.data_editor(
+        visible,
         column_config=column_cfg,
         num_rows="dynamic",
         use_container_width=True,
+        # computed columns skip edit tracking; the key is stable across
+        # reruns but moves whenever this session replaces project_df (save /
+        # switch / import) → never replays old edits onto a new frame
+        disabled=[c for c in _COMPUTED_COLS if c in project_df],
+        key=editor_key,
+    )
+    # read by _keep_page_edits on the next page change
+    st.session_state.editor_slice = (editor_key, lo, hi)
+    edited_df = (
+        edited_page if visible is project_df
+        else pd.concat([project_df.iloc[:lo], edited_page, project_df.iloc[hi:]],
+                       ignore_index=True)
     )
-
 
     col_calc, col_export = st.columns([1.5, 1])
 
     # ── Calculate & Save ----------------------------------------------------
     with col_calc:
         if st.button("Calculate & Save", type="primary"):
-            # basic validation
-            if edited_df["Task ID"].isna().any() or (edited_df["Task ID"] == "").any():
-                st.error("Task ID cannot be empty.")
-                st.stop()
-            dupes = edited_df["Task ID"].str.strip().str.upper().duplicated()
-            if dupes.any():
-                st.error(f"Duplicate Task ID: {edited_df['Task ID'][dupes].iloc[0]}")
+            # basic validation (empty / duplicate IDs)
+            problem = _id_problem(edited_df)
+            if problem:
+                st.error(problem)
                 st.stop()
+            # calculate_cpm skips unknown predecessors → flag them (non-blocking);
+            # split / strip exactly as it does, in one vectorised pass
+            dangling = _dangling_preds(edited_df)
+            if dangling:
+                st.warning("Unknown predecessor(s) ignored: " + ", ".join(dangling[:10])
+                           + (" …" if len(dangling) > 10 else ""))
 
             try:
-                cpm_df = calculate_cpm(edited_df.copy())
+                cpm_df = _cpm(edited_df)
             except ValueError as exc:
                 st.error(str(exc))
                 st.stop()
@@ -171,22 +264,23 @@ def show_project_view() -> None:
             # 1️⃣ drop any stale ES/EF cols to avoid _x / _y suffixes
             cleaned = edited_df.drop(columns=["ES", "EF", "es", "ef"], errors="ignore")
 
-            # 2️⃣ merge fresh CPM output
-            merged = (
-                cleaned.merge(cpm_df[["Task ID", "ES", "EF"]], on="Task ID", how="left")
-                .rename(columns={"ES": "es", "EF": "ef"})
-            )
+            # 2️⃣ attach fresh CPM output – calculate_cpm keeps edited_df's rows
+            # in order (1-to-1), so plain positional columns replace the merge
+            merged = cleaned.assign(
+                es=cpm_df["ES"].to_numpy(), ef=cpm_df["EF"].to_numpy()
+            ).reset_index(drop=True)
 
             # 3️⃣ persist
             save_tasks_to_db(merged, st.session_state.current_project_id)
             st.session_state.project_df = merged
             st.session_state.cpm_results = cpm_df
+            _new_grid()
             st.success("Saved 🚀")
 
     with col_export:
         st.download_button(
             "Export CSV",
-            edited_df.to_csv(index=False).encode(),
+            partial(_to_csv_bytes, edited_df),  # encoded on click, not per rerun
             "schedule_backup.csv",
             "text/csv",
         )
@@ -195,7 +289,13 @@ def show_project_view() -> None:
     if st.session_state.cpm_results is None:
         return
 
-    cpm_df = st.session_state.cpm_results
+    _show_results(st.session_state.cpm_results, picked_date)
+
+
+# ── helper: results ──────────────────────────────────────────────────────────
+@st.fragment
+def _show_results(cpm_df: pd.DataFrame, start_date: date) -> None:
+    """Results section – its widgets rerun this fragment only, not the page."""
     st.header("📊 Results")
 
     st.subheader("Critical Path Table")
@@ -216,89 +316,320 @@ def show_project_view() -> None:
             f"of {len(cpm_df)}",
         )
 
-    # build Gantt dataframe with calendar dates
-    gdf = cpm_df.copy()
-    gdf["Start"] = pd.to_datetime(picked_date) + pd.to_timedelta(
-        gdf["ES"] - 1, unit="D"
+    # nothing to draw → skip building / shipping two empty figures
+    if cpm_df.empty:
+        st.info("No tasks to chart.")
+        return
+
+    # thousands of SVG bars freeze the browser → summarise big schedules by
+    # WBS prefix and draw raw bars only for the group picked
+    if len(cpm_df) > _GANTT_MAX_BARS:
+        groups, names = _gantt_groups(cpm_df)
+        pick = st.selectbox("Gantt detail", [_SUMMARY, *names],
+                            key="gantt_group")
+        if pick == _SUMMARY:
+            fig = _gantt_summary(cpm_df, start_date)
+        else:
+            fig = _gantt_figure(cpm_df[(groups == pick).to_numpy()], start_date)
+    else:
+        fig = _gantt_figure(cpm_df, start_date)
+    # fixed key → the same chart element is updated in place (Plotly.react)
+    # when the drill-down or schedule changes, instead of being re-mounted
+    st.plotly_chart(fig, use_container_width=True, key="gantt_chart")
+
+    st.subheader("CPM Network Diagram")
+    # big graphs start hidden → their figure JSON is only built and shipped
+    # to the browser when asked for, not on every unrelated rerun
+    if st.toggle("Show network diagram", value=len(cpm_df) <= _WEBGL_MIN_NODES,
+                 key="show_network"):
+        st.plotly_chart(_create_network_diagram(cpm_df), use_container_width=True,
+                        key="network_chart")
+
+
+# ── helper: validation ───────────────────────────────────────────────────────
+def _id_problem(df: pd.DataFrame) -> str | None:
+    """Error message for missing / empty / duplicate Task IDs, else None."""
+    if "Task ID" not in df:
+        return "No 'Task ID' column."
+    # normalise once for both checks (astype("string") also covers numeric IDs)
+    keys = df["Task ID"].astype("string").str.strip().str.upper()
+    if keys.isna().any() or keys.eq("").any():
+        return "Task ID cannot be empty."
+    dupes = keys.duplicated().to_numpy()
+    if dupes.any():
+        return f"Duplicate Task ID: {df['Task ID'][dupes].iloc[0]}"
+    return None
+
+
+def _dangling_preds(df: pd.DataFrame) -> list[str]:
+    """Predecessor IDs that match no Task ID (first-seen order)."""
+    tokens = df["Predecessors"].astype("string").str.split(",").explode().str.strip()
+    tokens = tokens[tokens.notna() & tokens.ne("")]
+    return tokens[~tokens.isin(df["Task ID"].astype("string"))].unique().tolist()
+
+
+# ── helper: editor pages ─────────────────────────────────────────────────────
+def _apply_editor_delta(df: pd.DataFrame, delta: dict) -> pd.DataFrame:
+    """*df* with a data_editor's widget state (edited / deleted / added rows) applied."""
+    out = df.reset_index(drop=True)
+    edited = delta.get("edited_rows") or {}
+    if edited:
+        out = out.copy()
+        for row, changes in edited.items():
+            for col, val in changes.items():
+                out.loc[int(row), col] = val
+    deleted = delta.get("deleted_rows") or []
+    if deleted:
+        out = out.drop(index=deleted)
+    added = delta.get("added_rows") or []
+    if added:
+        out = pd.concat([out, pd.DataFrame(added).reindex(columns=out.columns)])
+    return out.reset_index(drop=True)
+
+
+# ── helper: cached CPM ───────────────────────────────────────────────────────
+_CPM_INT_COLS = ("Duration", "ES", "EF", "LS", "LF", "Float")
+
+
+def _frame_digest(df: pd.DataFrame) -> bytes:
+    """Content hash of every cell + column labels / dtypes (no row sampling)."""
+    cells = pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+    return cells + repr(list(df.dtypes.items())).encode()
+
+
+# per-schedule cache keyed on the full frame content (see _frame_digest)
+_frame_cache = partial(st.cache_data, show_spinner=False, max_entries=16,
+                       hash_funcs={pd.DataFrame: _frame_digest})
+
+
+@_frame_cache()
+def _cpm(df: pd.DataFrame) -> pd.DataFrame:
+    """calculate_cpm for an unchanged grid is served from cache."""
+    # non-mutating → no defensive copy; day numbers → smallest int dtype and
+    # Status / Yes-No → int8 codes (compared on every Gantt / network / progress
+    # build and kept in session state)
+    cpm_df = calculate_cpm(df)
+    status = cpm_df["Status"].astype("string")
+    # legacy / imported values outside the editor's options stay intact
+    extra = [v for v in status.dropna().unique() if v not in _STATUSES]
+    return cpm_df.assign(
+        **{c: pd.to_numeric(cpm_df[c], downcast="integer") for c in _CPM_INT_COLS},
+        **{"Status": status.astype(pd.CategoricalDtype([*_STATUSES, *extra])),
+           "On Critical Path?": cpm_df["On Critical Path?"].astype("category")},
     )
-    gdf["Finish"] = gdf["Start"] + pd.to_timedelta(gdf["Duration"], unit="D")
-
-    def _gcolor(row):
-        crit = row["On Critical Path?"] == "Yes"
-        return ("Critical" if crit else "Non-critical") + f" ({row['Status']})"
-
-    gdf["GanttColor"] = gdf.apply(_gcolor, axis=1)
-
-    st.plotly_chart(
-        px.timeline(
-            gdf,
-            x_start="Start",
-            x_end="Finish",
-            y="Task Description",
-            color="GanttColor",
-            hover_data=["Task ID", "Duration", "Status", "On Critical Path?"],
-        ).update_yaxes(autorange="reversed"),
-        use_container_width=True,
+
+
+# ── helper: Gantt ────────────────────────────────────────────────────────────
+def _gantt_figure(cpm_df: pd.DataFrame, start_date: date) -> go.Figure:
+    """Results Gantt – not cached: hashing the frame + unpickling a figure
+    costs as much as building its bars."""
+    # calendar dates
+    start, finish = task_dates(cpm_df, start_date)
+
+    # legend label in one vectorised pass (no row-wise apply); blank status →
+    # Not Started, any other value (e.g. "On Hold") keeps its own label
+    crit = cpm_df["On Critical Path?"].eq("Yes").to_numpy(dtype=bool, na_value=False)
+    status = cpm_df["Status"].astype("string").fillna("")
+    status = status.where(status.ne(""), "Not Started")
+    side = pd.Series(np.where(crit, "Critical", "Non-critical"), index=cpm_df.index)
+    gdf = cpm_df.assign(GanttColor=(side + " (" + status + ")").astype("category"))
+
+    return timeline(
+        gdf,
+        start,
+        finish,
+        color="GanttColor",
+        color_map={},  # Plotly default palette, as px.timeline drew it
+        hover_data=["Task ID", "Duration", "Status", "On Critical Path?"],
     )
 
-    st.subheader("CPM Network Diagram")
-    st.plotly_chart(_create_network_diagram(cpm_df), use_container_width=True)
 
+@_frame_cache()
+def _gantt_groups(cpm_df: pd.DataFrame) -> tuple[pd.Series, list[str]]:
+    """WBS group per task + distinct groups in schedule order (once per schedule)."""
+    groups = wbs_groups(cpm_df["Task ID"], _GANTT_MAX_BARS)
+    return groups, groups.unique().tolist()
+
+
+def _gantt_summary(cpm_df: pd.DataFrame, start_date: date) -> go.Figure:
+    """One bar per WBS group (min Start → max Finish) for large schedules."""
+    start, finish = task_dates(cpm_df, start_date)
+    sdf, start, finish = group_summary(cpm_df, start, finish, _gantt_groups(cpm_df)[0])
+    return timeline(
+        sdf,
+        start,
+        finish,
+        color="GanttColor",
+        color_map=_SUMMARY_COLORS,
+        hover_data=["Group", "Tasks", "Complete"],
+    )
 
-# ── helper: network diagram ──────────────────────────────────────────────────
-def _create_network_diagram(df: pd.DataFrame) -> go.Figure:
-    G = nx.DiGraph()
-    for _, row in df.iterrows():
-        G.add_node(row["Task ID"])
-        if pd.notna(row["Predecessors"]) and row["Predecessors"]:
-            preds = [p.strip() for p in re.split(r"[,\s;]+", str(row["Predecessors"])) if p]
-            G.add_edges_from([(p, row["Task ID"]) for p in preds])
 
+# ── helper: CSV export ───────────────────────────────────────────────────────
+@_frame_cache(max_entries=8)
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV payload for the download button – rebuilt only when *df* changes."""
+    buf = io.BytesIO()
     try:
-        layers = list(nx.topological_generations(G))
-        pos = {n: (i, -layers[i].index(n)) for i in range(len(layers)) for n in layers[i]}
-    except nx.NetworkXUnfeasible:
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed-type object column (e.g. freshly added editor rows) → pandas
+        # writes encoded bytes into the same buffer (no interim str)
+        buf.seek(0)
+        buf.truncate()
+        df.to_csv(buf, index=False, encoding="utf-8")
+    return buf.getvalue()
+
+
+# ── helper: network diagram ──────────────────────────────────────────────────
+_PRED_SPLIT = re.compile(r"[,\s;]+")
+_ARROW_STANDOFF = 0.22  # arrow tip distance before the target node (axis units)
+_WEBGL_MIN_NODES = 200  # above this the diagram renders through WebGL
+# shared edge styling (one dict, reused by every edge trace)
+_EDGE_LINE = dict(color="#888", width=1)
+_ARROW_MARKER = dict(symbol="arrow", angleref="previous", color="#888")
+
+
+def _segments(*points: np.ndarray) -> np.ndarray:
+    """Interleave per-edge point arrays into one NaN-separated polyline."""
+    gap = np.full(len(points[0]), np.nan)
+    return np.column_stack([*points, gap]).ravel()
+
+
+def _layers(n: int, ends: np.ndarray) -> np.ndarray | None:
+    """(generation, -row) per node via Kahn's algorithm; None on a cycle.
+
+    Same layering as ``nx.topological_generations`` but over int arrays –
+    no graph object, attribute dicts or generators.
+    """
+    src, dst = ends[:, 0], ends[:, 1]
+    # CSR adjacency → successors of u are succ[ptr[u]:ptr[u + 1]]
+    ptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))]).tolist()
+    succ = dst.tolist()
+    indeg = np.bincount(dst, minlength=n).tolist()
+    level, row = [0] * n, [0] * n
+    layer, i, seen = np.flatnonzero(np.asarray(indeg) == 0).tolist(), 0, 0
+    while layer:
+        nxt = []
+        for j, u in enumerate(layer):
+            level[u], row[u] = i, -j
+            for v in succ[ptr[u]:ptr[u + 1]]:
+                indeg[v] -= 1
+                if not indeg[v]:
+                    nxt.append(v)
+        seen += len(layer)
+        layer, i = nxt, i + 1
+    if seen < n:
+        return None
+    return np.column_stack([level, row]).reshape(-1, 2)
+
+
+@_frame_cache()
+def _graph_layout(links: pd.DataFrame) -> tuple[list, np.ndarray, np.ndarray]:
+    """Nodes, (N, 2) positions and (E, 2) edge rows for a Task ID / Predecessors frame.
+
+    Depends on the links only → status / duration edits reuse the layout.
+    """
+    tids = links["Task ID"].to_numpy()
+    # one vectorised split for the whole column (missing → NA, not a list)
+    pred_lists = links["Predecessors"].astype("string").str.split(_PRED_SPLIT)
+
+    # edge table (predecessor → task) in one explode
+    edges = pd.DataFrame({"src": pred_lists.to_numpy(), "dst": tids}).explode("src")
+    edges = edges[edges["src"].notna() & edges["src"].ne("")]
+
+    # nodes: the table's rows in order, then predecessors missing from it
+    src_ids = edges["src"].to_numpy()
+    missing = pd.unique(src_ids[~pd.Series(src_ids).isin(tids).to_numpy()])
+    nodes = [*tids, *missing]
+    index = pd.Index(nodes, dtype=object)
+
+    # int edge list: duplicates dropped (first wins), grouped by source in
+    # insertion order – the same order DiGraph.edges() would give
+    src, dst = index.get_indexer(src_ids), index.get_indexer(edges["dst"].to_numpy())
+    _, first = np.unique(src * len(nodes) + dst, return_index=True)
+    keep = np.sort(first)
+    keep = keep[np.argsort(src[keep], kind="stable")]
+    ends = np.column_stack([src[keep], dst[keep]]).astype(int).reshape(-1, 2)
+
+    layers = _layers(len(nodes), ends)
+    if layers is not None:
+        coords = layers.astype(float)
+    else:
+        # cycle → no layering; force-directed fallback
+        G = nx.DiGraph()
+        G.add_nodes_from(nodes)
+        G.add_edges_from((nodes[a], nodes[b]) for a, b in ends)
         pos = nx.spring_layout(G, seed=42)
+        coords = np.array([pos[n] for n in nodes], dtype=float).reshape(-1, 2)
+    return nodes, coords, ends
+
 
-    node_trace = go.Scatter(
-        x=[pos[n][0] for n in G],
-        y=[pos[n][1] for n in G],
+@_frame_cache()
+def _create_network_diagram(df: pd.DataFrame) -> go.Figure:
+    uniq = df.drop_duplicates("Task ID")
+    tids = uniq["Task ID"].to_numpy()
+    nodes, coords, ends = _graph_layout(uniq[["Task ID", "Predecessors"]])
+
+    # SVG chokes on thousands of markers → WebGL for large projects
+    large = len(nodes) > _WEBGL_MIN_NODES
+    node_trace = (go.Scattergl if large else go.Scatter)(
+        x=coords[:, 0],
+        y=coords[:, 1],
         mode="markers+text",
-        text=[n for n in G],
+        text=nodes,
         textposition="middle center",
         hoverinfo="text",
         marker=dict(size=24, line=dict(width=1, color="black")),
     )
 
-    colours, htxt = [], []
-    for n in G:
-        row = df.loc[df["Task ID"] == n]
-        if row.empty:
-            colours.append("grey")
-            htxt.append(f"{n} (missing)")
-        else:
-            crit = row["On Critical Path?"].iloc[0] == "Yes"
-            colours.append("red" if crit else "skyblue")
-            htxt.append(
-                f"{n}<br>{row['Task Description'].iloc[0]}<br>Dur {row['Duration'].iloc[0]}"
-            )
+    # known tasks: column-wise, positionally aligned with the node order;
+    # predecessors missing from the table were appended after them
+    crit = uniq["On Critical Path?"].eq("Yes").to_numpy(dtype=bool, na_value=False)
+    colours = np.where(crit, "red", "skyblue").tolist()
+    htxt = (
+        uniq["Task ID"].astype(str) + "<br>" + uniq["Task Description"].astype(str)
+        + "<br>Dur " + uniq["Duration"].astype(str)
+    ).tolist()
+    for n in nodes[len(tids):]:
+        colours.append("grey")
+        htxt.append(f"{n} (missing)")
     node_trace.marker.color = colours
     node_trace.hovertext = htxt
     node_trace.textfont = dict(color="white", size=10)
 
-    arrows = [
-        go.layout.Annotation(
-            ax=pos[a][0], ay=pos[a][1],
-            x=pos[b][0], y=pos[b][1],
-            xref="x", yref="y", axref="x", ayref="y",
-            showarrow=True, arrowhead=2, arrowwidth=1,
-            arrowsize=1.5, arrowcolor="#888", standoff=12,
-        )
-        for a, b in G.edges()
-    ]
+    # all edges in ONE trace: a → b polyline (NaN-separated) with an arrow
+    # marker just short of b, turned along the segment (angleref="previous")
+    edge_traces = []
+    if len(ends):
+        src, dst = coords[ends[:, 0]], coords[ends[:, 1]]
+        vec = dst - src
+        span = np.hypot(vec[:, 0], vec[:, 1])[:, None]
+        tip = dst - vec / np.where(span == 0, 1, span) * _ARROW_STANDOFF
+        if not large:
+            edge_traces.append(go.Scatter(
+                x=_segments(src[:, 0], tip[:, 0], dst[:, 0]),
+                y=_segments(src[:, 1], tip[:, 1], dst[:, 1]),
+                mode="lines+markers", hoverinfo="skip", line=_EDGE_LINE,
+                marker=dict(_ARROW_MARKER, size=np.tile([0, 11, 0, 0], len(src))),
+            ))
+        else:
+            # WebGL lines; WebGL markers can't follow the segment angle, so
+            # arrowheads (SVG) only on critical → critical edges
+            edge_traces.append(go.Scattergl(
+                x=_segments(src[:, 0], dst[:, 0]), y=_segments(src[:, 1], dst[:, 1]),
+                mode="lines", hoverinfo="skip", line=_EDGE_LINE,
+            ))
+            on_cp = np.concatenate([crit, np.zeros(len(nodes) - len(tids), bool)])
+            m = on_cp[ends[:, 0]] & on_cp[ends[:, 1]]
+            edge_traces.append(go.Scatter(
+                x=_segments(src[m, 0], tip[m, 0]), y=_segments(src[m, 1], tip[m, 1]),
+                mode="markers", hoverinfo="skip",
+                marker=dict(_ARROW_MARKER, size=np.tile([0, 11, 0], int(m.sum()))),
+            ))
 
     return go.Figure(
-        data=[node_trace],
+        data=[*edge_traces, node_trace],  # nodes drawn on top of the edges
         layout=go.Layout(
             title="CPM Network Diagram",
             showlegend=False,
@@ -306,6 +637,5 @@ def _create_network_diagram(df: pd.DataFrame) -> go.Figure:
             margin=dict(t=40, b=20, l=5, r=5),
             xaxis=dict(title="Sequence", showgrid=False, zeroline=False),
             yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            annotations=arrows,
         ),
     )